@@ -2,6 +2,7 @@
 
 from groq import Groq
 from typing import List, Dict, Any
+import asyncio
 import json
 import logging
 from tools.base import Tool, ToolResult
@@ -90,6 +91,52 @@ class ResumeAgent:
                 error=f"Tool execution error: {str(e)}"
             )
     
+    async def _execute_calls(self, parsed_calls: List[tuple]) -> List[ToolResult]:
+        """
+        Execute one turn's tool calls, in input order.
+
+        Multiple semantic searches in the same turn are coalesced into a
+        single batched Upstash round-trip via the search tool's
+        execute_multi(); everything else runs concurrently as before. If
+        the batch fails, the searches fall back to individual execution.
+        """
+        results: List[Any] = [None] * len(parsed_calls)
+
+        rag_tool = self.tools.get("rag_search_by_domain")
+        rag_indices = [
+            i for i, (_, name, args) in enumerate(parsed_calls)
+            if name == "rag_search_by_domain" and "query" in args
+        ]
+        if rag_tool is not None and len(rag_indices) > 1:
+            logger.info(f"🔎 Batching {len(rag_indices)} semantic searches into one round-trip")
+            batch = await rag_tool.execute_multi(
+                [parsed_calls[i][2] for i in rag_indices]
+            )
+            if batch.success:
+                for i, formatted in zip(rag_indices, batch.data):
+                    args = parsed_calls[i][2]
+                    results[i] = ToolResult(
+                        success=True,
+                        data=formatted,
+                        metadata={
+                            "query": args.get("query"),
+                            "domain": args.get("domain", "all"),
+                            "results_count": len(formatted)
+                        }
+                    )
+                    self.tool_calls_history.append("rag_search_by_domain")
+
+        pending = [i for i in range(len(parsed_calls)) if results[i] is None]
+        if pending:
+            gathered = await asyncio.gather(
+                *(self.execute_tool(parsed_calls[i][1], parsed_calls[i][2])
+                  for i in pending)
+            )
+            for i, result in zip(pending, gathered):
+                results[i] = result
+
+        return results
+
     async def run(self, user_query: str, max_iterations: int = 5) -> str:
         """
         Main agent loop with tool calling
@@ -138,22 +185,25 @@ class ResumeAgent:
                 if message.tool_calls:
                     logger.info(f"🔧 LLM requested {len(message.tool_calls)} tool call(s)")
                     
-                    # Execute all tool calls
-                    tool_results = []
+                    # Execute all tool calls concurrently - dense and sparse
+                    # retrieval are independent, so a multi-tool turn costs
+                    # max(latencies) instead of their sum
+                    parsed_calls = []
                     for tool_call in message.tool_calls:
-                        tool_name = tool_call.function.name
-                        
                         try:
                             arguments = json.loads(tool_call.function.arguments)
                         except json.JSONDecodeError as e:
                             logger.error(f"❌ Failed to parse tool arguments: {e}")
                             arguments = {}
-                        
-                        result = await self.execute_tool(tool_name, arguments)
-                        tool_results.append({
-                            "tool_call_id": tool_call.id,
-                            "result": result
-                        })
+                        parsed_calls.append(
+                            (tool_call.id, tool_call.function.name, arguments)
+                        )
+
+                    results = await self._execute_calls(parsed_calls)
+                    tool_results = [
+                        {"tool_call_id": call_id, "result": result}
+                        for (call_id, _, _), result in zip(parsed_calls, results)
+                    ]
                     
                     # Add assistant's tool calls to history
                     self.conversation_history.append({
@@ -174,11 +224,10 @@ class ResumeAgent:
                     
                     # Add tool results to history
                     for tr in tool_results:
-                        result_dict = tr["result"].dict()
                         self.conversation_history.append({
                             "role": "tool",
                             "tool_call_id": tr["tool_call_id"],
-                            "content": json.dumps(result_dict)
+                            "content": tr["result"].to_json()
                         })
                     
                     # Continue loop to let LLM synthesize response
@@ -0,0 +1,5 @@
+"""Database helpers shared by scripts and serverless endpoints"""
+
+from .pool import get_pool, close_pool
+
+__all__ = ['get_pool', 'close_pool']
@@ -0,0 +1,46 @@
+"""
+Process-wide asyncpg pool for scripts and serverless endpoints.
+
+Opening a raw connection per script run pays the full TCP+TLS+auth handshake
+every time; scripts that then loop over rows multiply that cost. Everything
+that previously called `asyncpg.connect` directly can instead do:
+
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        ...
+"""
+import os
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_pool = None
+
+
+async def get_pool():
+    """Return the shared pool, creating it lazily on first use.
+
+    Raises RuntimeError when the database is not configured.
+    """
+    global _pool
+    if _pool is None:
+        database_url = os.getenv('DATABASE_URL') or os.getenv('DATABASE_URL_UNPOOLED')
+        if not database_url:
+            raise RuntimeError('DATABASE_URL not set')
+        _pool = await asyncpg.create_pool(
+            database_url,
+            min_size=5,
+            max_size=20,
+            max_inactive_connection_lifetime=300,
+            command_timeout=60,
+        )
+    return _pool
+
+
+async def close_pool():
+    """Close the shared pool (call at script shutdown)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
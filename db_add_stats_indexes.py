@@ -0,0 +1,60 @@
+"""
+Create the indexes that make StatsTool's filter slots index-sargable.
+
+Usage:
+    python db_add_stats_indexes.py
+
+`EXTRACT(YEAR FROM start_date)::int >= $n` can only use an index when one
+exists on that exact expression, so the year filters get an expression
+b-tree; the GIN index keeps `tags && $n` cheap and lets the planner
+bitmap-AND it with the year index for combined filters.
+
+It reads DATABASE_URL or DATABASE_URL_UNPOOLED from environment.
+"""
+import os
+import asyncio
+import asyncpg
+
+DB_URL = os.environ.get('DATABASE_URL') or os.environ.get('DATABASE_URL_UNPOOLED')
+
+CREATE_INDEXES_SQL = (
+    '''
+    CREATE INDEX IF NOT EXISTS records_start_year_idx
+    ON records ((EXTRACT(YEAR FROM start_date)::int));
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS records_tags_gin
+    ON records USING GIN (tags array_ops);
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS records_year_start_date_idx
+    ON records ((EXTRACT(YEAR FROM start_date)::int), start_date DESC);
+    ''',
+) + tuple(
+    # Tiny per-type partial indexes keep the types_distribution COUNTs
+    # index-only
+    f'''
+    CREATE INDEX IF NOT EXISTS records_type_{record_type}_idx
+    ON records (id) WHERE type = '{record_type}';
+    '''
+    for record_type in ('project', 'education', 'experience', 'fact')
+)
+
+
+async def create_indexes():
+    if not DB_URL:
+        print('DATABASE_URL or DATABASE_URL_UNPOOLED is not set in environment. Aborting.')
+        return
+
+    print('Connecting to', DB_URL.split('@')[-1][:80])
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        for sql in CREATE_INDEXES_SQL:
+            await conn.execute(sql)
+        print(f'Created {len(CREATE_INDEXES_SQL)} stats indexes (or already exist)')
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(create_indexes())
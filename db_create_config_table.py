@@ -0,0 +1,73 @@
+"""
+Create the config table and its change-notification trigger.
+
+Usage:
+    python db_create_config_table.py
+
+Run once at deploy so scripts like update_system_prompt.py can assume the
+table exists and write in a single round-trip. The trigger notifies the
+'config_changed' channel so in-process caches invalidate immediately
+instead of waiting out a TTL.
+
+It reads DATABASE_URL or DATABASE_URL_UNPOOLED from environment.
+"""
+import os
+import asyncio
+import asyncpg
+
+DB_URL = os.environ.get('DATABASE_URL') or os.environ.get('DATABASE_URL_UNPOOLED')
+
+CREATE_CONFIG_SQL = (
+    '''
+    CREATE TABLE IF NOT EXISTS config (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    );
+    ''',
+    '''
+    CREATE OR REPLACE FUNCTION notify_config_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('config_changed', NEW.key);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    ''',
+    '''
+    DROP TRIGGER IF EXISTS config_changed_trigger ON config;
+    ''',
+    '''
+    CREATE TRIGGER config_changed_trigger
+    AFTER INSERT OR UPDATE ON config
+    FOR EACH ROW EXECUTE FUNCTION notify_config_changed();
+    ''',
+    # Server-side upsert helper so writers send one short statement with a
+    # stable plan instead of shipping the full INSERT ... ON CONFLICT text
+    '''
+    CREATE OR REPLACE FUNCTION set_config_value(k text, v text) RETURNS void AS $$
+        INSERT INTO config (key, value, updated_at)
+        VALUES (k, v, NOW())
+        ON CONFLICT (key)
+        DO UPDATE SET value = EXCLUDED.value, updated_at = NOW();
+    $$ LANGUAGE SQL;
+    ''',
+)
+
+
+async def create_config_table():
+    if not DB_URL:
+        print('DATABASE_URL or DATABASE_URL_UNPOOLED is not set in environment. Aborting.')
+        return
+
+    print('Connecting to', DB_URL.split('@')[-1][:80])
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        for sql in CREATE_CONFIG_SQL:
+            await conn.execute(sql)
+        print('Created config table and config_changed trigger (or already exist)')
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(create_config_table())
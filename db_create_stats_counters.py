@@ -0,0 +1,118 @@
+"""
+Create the trigger-maintained counter tables behind StatsTool's unfiltered
+tag and type distributions.
+
+Usage:
+    python db_create_stats_counters.py
+
+Unlike the materialized views (db_create_stats_views.py), these counters
+update incrementally on every records write, so reads are a b-tree range
+scan over a handful of rows with no refresh step and no dependence on the
+records table size. The script also backfills both tables from the current
+records, so it is safe to run on an existing database.
+
+It reads DATABASE_URL or DATABASE_URL_UNPOOLED from environment.
+"""
+import os
+import asyncio
+import asyncpg
+
+DB_URL = os.environ.get('DATABASE_URL') or os.environ.get('DATABASE_URL_UNPOOLED')
+
+CREATE_COUNTERS_SQL = (
+    '''
+    CREATE TABLE IF NOT EXISTS tag_counts (
+        tag TEXT PRIMARY KEY,
+        n INTEGER NOT NULL DEFAULT 0
+    );
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS type_counts (
+        type TEXT PRIMARY KEY,
+        n INTEGER NOT NULL DEFAULT 0
+    );
+    ''',
+    # Tags are aggregated per statement before touching tag_counts: a
+    # duplicate tag in one row would otherwise hit the same counter row
+    # twice and abort the write with "ON CONFLICT DO UPDATE command cannot
+    # affect row a second time". Counting occurrences (not distinct tags)
+    # also keeps the trigger consistent with the backfill below.
+    '''
+    CREATE OR REPLACE FUNCTION maintain_stats_counts() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE tag_counts SET n = tag_counts.n - d.n
+            FROM (
+                SELECT tag, COUNT(*) AS n
+                FROM unnest(OLD.tags) t(tag)
+                GROUP BY tag
+            ) d
+            WHERE tag_counts.tag = d.tag;
+            UPDATE type_counts SET n = n - 1 WHERE type = OLD.type;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO tag_counts (tag, n)
+            SELECT tag, COUNT(*)
+            FROM unnest(NEW.tags) t(tag)
+            GROUP BY tag
+            ON CONFLICT (tag) DO UPDATE SET n = tag_counts.n + EXCLUDED.n;
+            INSERT INTO type_counts (type, n)
+            VALUES (NEW.type, 1)
+            ON CONFLICT (type) DO UPDATE SET n = type_counts.n + 1;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    ''',
+    '''
+    DROP TRIGGER IF EXISTS records_stats_counts_trigger ON records;
+    ''',
+    '''
+    CREATE TRIGGER records_stats_counts_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON records
+    FOR EACH ROW EXECUTE FUNCTION maintain_stats_counts();
+    ''',
+)
+
+# Rebuild both counters from the live table; rerunning the script resyncs
+# them after any out-of-band writes
+BACKFILL_SQL = (
+    'TRUNCATE tag_counts;',
+    '''
+    INSERT INTO tag_counts (tag, n)
+    SELECT tag, COUNT(*)
+    FROM (SELECT unnest(tags) AS tag FROM records) s
+    GROUP BY tag;
+    ''',
+    'TRUNCATE type_counts;',
+    '''
+    INSERT INTO type_counts (type, n)
+    SELECT type, COUNT(*)
+    FROM records
+    GROUP BY type;
+    ''',
+)
+
+
+async def create_counters():
+    if not DB_URL:
+        print('DATABASE_URL or DATABASE_URL_UNPOOLED is not set in environment. Aborting.')
+        return
+
+    print('Connecting to', DB_URL.split('@')[-1][:80])
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        for sql in CREATE_COUNTERS_SQL:
+            await conn.execute(sql)
+        print('Created tag_counts/type_counts and their trigger (or already exist)')
+
+        async with conn.transaction():
+            for sql in BACKFILL_SQL:
+                await conn.execute(sql)
+        print('Backfilled counters from the records table')
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(create_counters())
@@ -0,0 +1,94 @@
+"""
+Create (or refresh) the materialized views backing StatsTool's distribution
+and timeline statistics.
+
+Usage:
+    python db_create_stats_views.py           # create views + indexes
+    python db_create_stats_views.py refresh   # refresh after record upserts
+
+The views pre-aggregate the records table so `tags_distribution` and
+`timeline` read a few hundred pre-computed rows instead of unnesting and
+grouping the whole table per request. The unique indexes allow
+REFRESH MATERIALIZED VIEW CONCURRENTLY, which keeps reads unblocked.
+
+It reads DATABASE_URL or DATABASE_URL_UNPOOLED from environment.
+"""
+import os
+import sys
+import asyncio
+import asyncpg
+
+DB_URL = os.environ.get('DATABASE_URL') or os.environ.get('DATABASE_URL_UNPOOLED')
+
+CREATE_TAG_COUNTS_SQL = '''
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_tag_counts AS
+SELECT type, unnest(tags) AS tag, COUNT(*) AS count
+FROM records
+GROUP BY type, tag;
+'''
+
+CREATE_TAG_COUNTS_INDEX_SQL = '''
+CREATE UNIQUE INDEX IF NOT EXISTS mv_tag_counts_type_tag_idx
+ON mv_tag_counts (type, tag);
+'''
+
+CREATE_YEAR_COUNTS_SQL = '''
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_year_counts AS
+SELECT type,
+       EXTRACT(YEAR FROM start_date)::integer AS year,
+       COUNT(*) AS count,
+       (array_agg(title ORDER BY start_date DESC))[1:5] AS titles
+FROM records
+WHERE start_date IS NOT NULL
+GROUP BY type, year;
+'''
+
+CREATE_YEAR_COUNTS_INDEX_SQL = '''
+CREATE UNIQUE INDEX IF NOT EXISTS mv_year_counts_type_year_idx
+ON mv_year_counts (type, year);
+'''
+
+REFRESH_SQL = (
+    'REFRESH MATERIALIZED VIEW CONCURRENTLY mv_tag_counts',
+    'REFRESH MATERIALIZED VIEW CONCURRENTLY mv_year_counts',
+)
+
+
+async def create_views():
+    if not DB_URL:
+        print('DATABASE_URL or DATABASE_URL_UNPOOLED is not set in environment. Aborting.')
+        return
+
+    print('Connecting to', DB_URL.split('@')[-1][:80])
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        await conn.execute(CREATE_TAG_COUNTS_SQL)
+        await conn.execute(CREATE_TAG_COUNTS_INDEX_SQL)
+        print('Created materialized view mv_tag_counts (or already exists)')
+
+        await conn.execute(CREATE_YEAR_COUNTS_SQL)
+        await conn.execute(CREATE_YEAR_COUNTS_INDEX_SQL)
+        print('Created materialized view mv_year_counts (or already exists)')
+    finally:
+        await conn.close()
+
+
+async def refresh_views():
+    if not DB_URL:
+        print('DATABASE_URL or DATABASE_URL_UNPOOLED is not set in environment. Aborting.')
+        return
+
+    conn = await asyncpg.connect(DB_URL)
+    try:
+        for sql in REFRESH_SQL:
+            await conn.execute(sql)
+        print('Refreshed mv_tag_counts and mv_year_counts')
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'refresh':
+        asyncio.run(refresh_views())
+    else:
+        asyncio.run(create_views())
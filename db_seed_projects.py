@@ -9,6 +9,7 @@ It reads DATABASE_URL or DATABASE_URL_UNPOOLED from environment.
 import os
 import json
 import asyncio
+from datetime import date
 import asyncpg
 
 DB_URL = os.environ.get('DATABASE_URL') or os.environ.get('DATABASE_URL_UNPOOLED')
@@ -27,20 +28,33 @@ CREATE TABLE IF NOT EXISTS projects (
 );
 '''
 
-INSERT_SQL = '''
+# Bulk write path: COPY streams all rows in one protocol exchange instead of
+# a parse/bind/execute round-trip per row, and the staging-table merge keeps
+# the ON CONFLICT upsert semantics.
+CREATE_STAGING_SQL = '''
+CREATE TEMP TABLE projects_staging (LIKE projects INCLUDING DEFAULTS) ON COMMIT DROP;
+'''
+
+MERGE_SQL = '''
 INSERT INTO projects (id, title, summary, tags, url, data, start_date, end_date, priority)
-VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-ON CONFLICT (id) DO UPDATE SET 
-    title = EXCLUDED.title, 
-    summary = EXCLUDED.summary, 
-    tags = EXCLUDED.tags, 
-    url = EXCLUDED.url, 
+SELECT id, title, summary, tags, url, data, start_date, end_date, priority
+FROM projects_staging
+ON CONFLICT (id) DO UPDATE SET
+    title = EXCLUDED.title,
+    summary = EXCLUDED.summary,
+    tags = EXCLUDED.tags,
+    url = EXCLUDED.url,
     data = EXCLUDED.data,
     start_date = EXCLUDED.start_date,
     end_date = EXCLUDED.end_date,
     priority = EXCLUDED.priority;
 '''
 
+COPY_COLUMNS = (
+    'id', 'title', 'summary', 'tags', 'url', 'data',
+    'start_date', 'end_date', 'priority',
+)
+
 MOCK_PROJECTS = [
     {
         "id": "proj-1",
@@ -105,24 +119,28 @@ async def seed():
         await conn.execute(CREATE_TABLE_SQL)
         print('Ensured projects table exists')
 
-        for p in MOCK_PROJECTS:
-            # Convert date strings to date objects (None stays None)
-            start_date = p['start_date'] if p['start_date'] else None
-            end_date = p['end_date'] if p['end_date'] else None
-            
-            await conn.execute(
-                INSERT_SQL, 
-                p['id'], 
-                p['title'], 
-                p['summary'], 
-                p['tags'], 
-                p['url'], 
+        rows = [
+            (
+                p['id'],
+                p['title'],
+                p['summary'],
+                p['tags'],
+                p['url'],
                 json.dumps(p),
-                start_date,
-                end_date,
-                p.get('priority', 3)  # Default to 3 if not specified
+                # Convert date strings to date objects (None stays None)
+                date.fromisoformat(p['start_date']) if p['start_date'] else None,
+                date.fromisoformat(p['end_date']) if p['end_date'] else None,
+                p.get('priority', 3),  # Default to 3 if not specified
+            )
+            for p in MOCK_PROJECTS
+        ]
+        async with conn.transaction():
+            await conn.execute(CREATE_STAGING_SQL)
+            await conn.copy_records_to_table(
+                'projects_staging', records=rows, columns=COPY_COLUMNS
             )
-        print(f'Seeded {len(MOCK_PROJECTS)} mock projects')
+            await conn.execute(MERGE_SQL)
+        print(f'Seeded {len(rows)} mock projects')
     finally:
         await conn.close()
 
@@ -3,7 +3,10 @@ from fastapi.responses import JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import os
+import re
+import asyncio
 import hashlib
+import hmac
 import asyncpg
 from datetime import date, datetime
 
@@ -14,6 +17,35 @@ db_pool = None
 agent = None
 
 
+async def _warm_connection(conn):
+    """Pool init callback: prepare the tools' hot statements on each new
+    connection so the first real query hits a warm plan cache."""
+    from tools.detail_tool import DETAIL_SQL
+    from tools.date_query_tool import _SQL_TEMPLATES as date_sql
+    from tools.filter_tool import _SQL_TEMPLATES as filter_sql
+    from tools.stats_tool import WARM_SQL as stats_sql
+
+    warm_statements = (
+        DETAIL_SQL,
+        # The agent's most common shapes: recency queries (all types and
+        # per-type) plus type and tag filters
+        date_sql[(False, False, False, False, False, "DESC")],
+        date_sql[(True, False, False, False, False, "DESC")],
+        filter_sql[(True, False, False, False, False)],
+        filter_sql[(False, True, False, False, False)],
+    ) + stats_sql
+    for sql in warm_statements:
+        # fetch() goes through the connection's statement LRU cache, which
+        # is what later tool queries hit; prepare() bypasses that cache
+        # (use_cache=False) and its statement is deallocated once the
+        # returned object is dropped. Binding NULL for every parameter
+        # keeps the filtered statements to zero-row executions; the
+        # unfiltered ones scan the small records table once, which doubles
+        # as a page-cache warm-up.
+        nparams = max((int(n) for n in re.findall(r'\$(\d+)', sql)), default=0)
+        await conn.fetch(sql, *([None] * nparams))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage database connection pool and AI agent lifecycle."""
@@ -25,7 +57,9 @@ async def lifespan(app: FastAPI):
                 DATABASE_URL,
                 min_size=2,
                 max_size=10,
-                command_timeout=60
+                command_timeout=60,
+                statement_cache_size=256,
+                init=_warm_connection
             )
             print("Database connection pool initialized")
         except Exception as e:
@@ -79,8 +113,11 @@ except Exception as e:
 
 
 # Utility functions
+PBKDF2_ITERATIONS = 100_000  # must match set_panel_password.py
+
+
 def hash_password(password: str) -> str:
-    """Hash password using SHA-256."""
+    """Hash password using SHA-256 (legacy scheme, kept for old stored hashes)."""
     return hashlib.sha256(password.encode('utf-8')).hexdigest()
 
 
@@ -113,13 +150,57 @@ async def verify_password(password: str) -> bool:
                 return False
             
             stored_hash = row['value']
-            input_hash = hash_password(password)
-            return stored_hash == input_hash
+            if '$' in stored_hash:
+                # Salted PBKDF2 scheme written by set_panel_password.py
+                salt_hex, digest_hex = stored_hash.split('$', 1)
+                digest = hashlib.pbkdf2_hmac(
+                    'sha256', password.encode('utf-8'),
+                    bytes.fromhex(salt_hex), PBKDF2_ITERATIONS
+                )
+                return hmac.compare_digest(digest.hex(), digest_hex)
+            # Legacy unsalted SHA-256 hashes
+            return hmac.compare_digest(hash_password(password), stored_hash)
     except Exception as e:
         print(f"Password verification error: {e}")
         return False
 
 
+async def _refresh_stats_views():
+    """Refresh the stats materialized views after a records write.
+
+    Runs as a background task so the admin response doesn't wait on the
+    refresh; REFRESH ... CONCURRENTLY keeps reads unblocked meanwhile.
+    """
+    from db_create_stats_views import REFRESH_SQL
+    try:
+        async with db_pool.acquire() as conn:
+            for sql in REFRESH_SQL:
+                await conn.execute(sql)
+    except asyncpg.UndefinedTableError:
+        # Views not created yet - StatsTool falls back to live aggregates
+        pass
+    except Exception as e:
+        print(f"Stats view refresh failed: {e}")
+
+
+def _invalidate_after_write(record_id=None):
+    """Flush tool caches and kick off a view refresh after an admin write.
+
+    Without this, type-filtered tags_distribution/timeline keep serving the
+    pre-edit materialized views and the tools' TTL caches serve pre-edit
+    rows until they expire.
+    """
+    if agent:
+        stats_tool = agent.tools.get('get_statistics')
+        if stats_tool is not None:
+            stats_tool.invalidate()
+        detail_tool = agent.tools.get('get_record_details')
+        if detail_tool is not None and record_id:
+            detail_tool.invalidate(record_id)
+    if db_pool:
+        asyncio.create_task(_refresh_stats_views())
+
+
 # Chat endpoint
 @app.post('/api/chat')
 async def chat(request: Request):
@@ -264,7 +345,8 @@ async def list_or_create_records(request: Request):
                     record.get('priority', 3),
                     facts
                 )
-                
+
+                _invalidate_after_write(record['id'])
                 return JSONResponse({'status': 'ok', 'message': 'Record created successfully', 'id': record['id']})
         except Exception as e:
             import traceback
@@ -378,7 +460,8 @@ async def update_record(record_id: str, request: Request):
                 facts,
                 record_id
             )
-            
+
+            _invalidate_after_write(record_id)
             return JSONResponse({'status': 'ok', 'message': 'Record updated successfully', 'id': record_id})
     except Exception as e:
         return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
@@ -400,7 +483,8 @@ async def delete_record(record_id: str, request: Request):
     try:
         async with db_pool.acquire() as conn:
             await conn.execute('DELETE FROM records WHERE id = $1', record_id)
-            return JSONResponse({'status': 'ok', 'message': 'Record deleted successfully', 'id': record_id})
+        _invalidate_after_write(record_id)
+        return JSONResponse({'status': 'ok', 'message': 'Record deleted successfully', 'id': record_id})
     except Exception as e:
         return JSONResponse({'status': 'error', 'message': str(e)}, status_code=500)
 
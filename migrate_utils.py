@@ -11,8 +11,11 @@ This module is usable from serverless endpoints (async) or CLI scripts via
 import os
 import json
 import asyncio
+import logging
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 
 try:
@@ -22,16 +25,124 @@ except Exception:
 
 from upstash_vector import Index
 
+from db import get_pool
+
+
+def _read_config():
+    """Read connection settings from the environment."""
+    return (
+        os.getenv('DATABASE_URL') or os.getenv('DATABASE_URL_UNPOOLED'),
+        os.getenv('UPSTASH_VECTOR_REST_URL'),
+        os.getenv('UPSTASH_VECTOR_REST_TOKEN'),
+    )
+
+
+# Validated once at import; per-call os.getenv lookups add up under the
+# serverless endpoint that invokes the migration repeatedly.
+DATABASE_URL, UPSTASH_VECTOR_REST_URL, UPSTASH_VECTOR_REST_TOKEN = _read_config()
+
+
+def reload_config():
+    """Re-read environment configuration (mainly for tests)."""
+    global DATABASE_URL, UPSTASH_VECTOR_REST_URL, UPSTASH_VECTOR_REST_TOKEN
+    DATABASE_URL, UPSTASH_VECTOR_REST_URL, UPSTASH_VECTOR_REST_TOKEN = _read_config()
+
+
+# Hot SELECT used on every migration run; kept as a module constant so it can be
+# prepared once per connection instead of re-parsed by the server on each call.
+SELECT_RECORDS_SQL = '''
+    SELECT id, type, title, summary, tags, detail_site, additional_url,
+           start_date, end_date, priority, facts
+    FROM records
+    ORDER BY priority DESC, type, id
+'''
+
+# Upsert in chunks instead of one HTTP round-trip per record; a few batches
+# run concurrently, capped so we stay inside Upstash rate limits
+UPSERT_BATCH_SIZE = 100
+UPSERT_CONCURRENCY = 4
+
+# Rows fetched per cursor round-trip while streaming the records table
+CURSOR_PREFETCH = 500
+
+
+def _build_vector(record):
+    """Build the (vector_id, enriched_text, metadata) upsert tuple for a record."""
+    # Build comprehensive enriched text with ALL metadata
+    enriched_parts = []
+
+    # 1. Title (highest semantic weight)
+    if record.get('title'):
+        enriched_parts.append(record['title'])
+
+    # 2. Summary (detailed content)
+    if record.get('summary'):
+        enriched_parts.append(record['summary'])
+
+    # 3. Facts (key information points)
+    if record.get('facts'):
+        facts_str = '. '.join(record['facts'])
+        enriched_parts.append(f"Key facts: {facts_str}")
+
+    # 4. Tags (keywords for semantic search)
+    if record.get('tags'):
+        tags_str = ' '.join(record['tags'])
+        enriched_parts.append(f"Technologies: {tags_str}")
+
+    # 5. Detail site URL
+    if record.get('detail_site'):
+        enriched_parts.append(f"Website: {record['detail_site']}")
+
+    # 6. Additional URLs with labels (single extend keeps the hot loop tight)
+    if record.get('additional_url'):
+        enriched_parts.extend(
+            f"{label.capitalize()}: {url}"
+            for label, url in (pair for pair in record['additional_url'] if len(pair) == 2)
+        )
+
+    # 7. Temporal information
+    date_parts = []
+    if record.get('start_date'):
+        date_parts.append(f"from {record['start_date']}")
+    if record.get('end_date'):
+        date_parts.append(f"to {record['end_date']}")
+    if date_parts:
+        enriched_parts.append(f"Duration {' '.join(date_parts)}")
+
+    # 8. Type/Category
+    record_type = record.get('type', 'project')
+    enriched_parts.append(f"Category: {record_type}")
+
+    # Join all parts into enriched text
+    enriched_text = ". ".join(enriched_parts) + "."
+
+    # Build metadata for storage including facts
+    metadata = {
+        'id': record['id'],
+        'type': record_type,
+        'title': record.get('title', 'untitled'),
+        'summary': record.get('summary', ''),
+        'facts': record.get('facts', []),
+        'tags': record.get('tags', []),
+        'detail_site': record.get('detail_site', ''),
+        'additional_url': record.get('additional_url', []),
+        'start_date': record.get('start_date'),
+        'end_date': record.get('end_date'),
+        'priority': record.get('priority', 3),
+        'source': record_type  # Use type as source
+    }
+
+    # Create namespaced ID: {type}:{id}
+    vector_id = f"{record_type}:{record['id']}"
+
+    return (str(vector_id), enriched_text, metadata)
+
 
 async def migrate_records_async():
     """Read records from Postgres and upsert to Upstash Vector with enhanced metadata.
 
     Returns a dict: { total, upserted, errors }
     """
-    DATABASE_URL = os.getenv('DATABASE_URL') or os.getenv('DATABASE_URL_UNPOOLED')
-    UPSTASH_VECTOR_REST_URL = os.getenv('UPSTASH_VECTOR_REST_URL')
-    UPSTASH_VECTOR_REST_TOKEN = os.getenv('UPSTASH_VECTOR_REST_TOKEN')
-
     if not DATABASE_URL:
         raise RuntimeError('DATABASE_URL not set')
     if asyncpg is None:
@@ -39,120 +150,79 @@ async def migrate_records_async():
     if not UPSTASH_VECTOR_REST_URL or not UPSTASH_VECTOR_REST_TOKEN:
         raise RuntimeError('Upstash configuration missing')
 
-    conn = await asyncpg.connect(DATABASE_URL)
-    try:
-        # Read from records table with new schema including facts
-        rows = await conn.fetch('''
-            SELECT id, type, title, summary, tags, detail_site, additional_url, 
-                   start_date, end_date, priority, facts
-            FROM records 
-            ORDER BY priority DESC, type, id
-        ''')
-        
-        records = []
-        for r in rows:
-            record = {
-                'id': r['id'],
-                'type': r['type'],
-                'title': r['title'],
-                'summary': r['summary'],
-                'tags': list(r['tags']) if r['tags'] else [],
-                'detail_site': r['detail_site'],
-                'additional_url': r['additional_url'] if r['additional_url'] else [],
-                'start_date': r['start_date'].isoformat() if r['start_date'] else None,
-                'end_date': r['end_date'].isoformat() if r['end_date'] else None,
-                'priority': r['priority'],
-                'facts': list(r['facts']) if r['facts'] else []
-            }
-            records.append(record)
-    finally:
-        await conn.close()
-
-    total = len(records)
+    total = 0
     upserted = 0
     errors = []
 
     index = Index(url=UPSTASH_VECTOR_REST_URL, token=UPSTASH_VECTOR_REST_TOKEN)
 
-    for record in records:
-        try:
-            # Build comprehensive enriched text with ALL metadata
-            enriched_parts = []
-            
-            # 1. Title (highest semantic weight)
-            if record.get('title'):
-                enriched_parts.append(record['title'])
-            
-            # 2. Summary (detailed content)
-            if record.get('summary'):
-                enriched_parts.append(record['summary'])
-            
-            # 3. Facts (key information points)
-            if record.get('facts'):
-                facts_str = '. '.join(record['facts'])
-                enriched_parts.append(f"Key facts: {facts_str}")
-            
-            # 4. Tags (keywords for semantic search)
-            if record.get('tags'):
-                tags_str = ' '.join(record['tags'])
-                enriched_parts.append(f"Technologies: {tags_str}")
-            
-            # 5. Detail site URL
-            if record.get('detail_site'):
-                enriched_parts.append(f"Website: {record['detail_site']}")
-            
-            # 6. Additional URLs with labels
-            if record.get('additional_url'):
-                for url_pair in record['additional_url']:
-                    if len(url_pair) == 2:
-                        label, url = url_pair
-                        enriched_parts.append(f"{label.capitalize()}: {url}")
-            
-            # 7. Temporal information
-            date_parts = []
-            if record.get('start_date'):
-                date_parts.append(f"from {record['start_date']}")
-            if record.get('end_date'):
-                date_parts.append(f"to {record['end_date']}")
-            if date_parts:
-                enriched_parts.append(f"Duration {' '.join(date_parts)}")
-            
-            # 8. Type/Category
-            record_type = record.get('type', 'project')
-            enriched_parts.append(f"Category: {record_type}")
-            
-            # Join all parts into enriched text
-            enriched_text = ". ".join(enriched_parts) + "."
-            
-            # Build metadata for storage including facts
-            metadata = {
-                'id': record['id'],
-                'type': record_type,
-                'title': record.get('title', 'untitled'),
-                'summary': record.get('summary', ''),
-                'facts': record.get('facts', []),
-                'tags': record.get('tags', []),
-                'detail_site': record.get('detail_site', ''),
-                'additional_url': record.get('additional_url', []),
-                'start_date': record.get('start_date'),
-                'end_date': record.get('end_date'),
-                'priority': record.get('priority', 3),
-                'source': record_type  # Use type as source
-            }
-            
-            # Create namespaced ID: {type}:{id}
-            vector_id = f"{record_type}:{record['id']}"
-            
-            # Upsert to vector DB
-            await asyncio.to_thread(index.upsert, [(str(vector_id), enriched_text, metadata)])
-            upserted += 1
-            
-            print(f"✅ Upserted {vector_id}: {record.get('title', 'untitled')[:50]}...")
-            
-        except Exception as e:
-            error_msg = {'id': record.get('id'), 'type': record.get('type'), 'error': str(e)}
-            errors.append(error_msg)
-            print(f"❌ Error upserting {record.get('id')}: {str(e)}")
+    sem = asyncio.Semaphore(UPSERT_CONCURRENCY)
+
+    async def upsert_batch(batch):
+        async with sem:
+            await asyncio.to_thread(index.upsert, [tup for tup, _ in batch])
+
+    # The shared pool amortizes the TCP+TLS+auth handshake across invocations
+    # (the serverless upsert endpoint calls this repeatedly). Rows stream
+    # through a server-side cursor and each full batch is dispatched while
+    # Postgres is still sending the next one, so peak memory stays at
+    # O(batch size) and upload overlaps the read.
+    pool = await get_pool()
+    in_flight = []
+    batch = []
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            async for r in conn.cursor(SELECT_RECORDS_SQL, prefetch=CURSOR_PREFETCH):
+                total += 1
+                record = {
+                    'id': r['id'],
+                    'type': r['type'],
+                    'title': r['title'],
+                    'summary': r['summary'],
+                    'tags': list(r['tags']) if r['tags'] else [],
+                    'detail_site': r['detail_site'],
+                    'additional_url': r['additional_url'] if r['additional_url'] else [],
+                    'start_date': r['start_date'].isoformat() if r['start_date'] else None,
+                    'end_date': r['end_date'].isoformat() if r['end_date'] else None,
+                    'priority': r['priority'],
+                    'facts': list(r['facts']) if r['facts'] else []
+                }
+                try:
+                    batch.append((_build_vector(record), record))
+                except Exception as e:
+                    errors.append({
+                        'id': record.get('id'),
+                        'type': record.get('type'),
+                        'error': str(e),
+                    })
+                    logger.warning("Error preparing %s: %s", record.get('id'), e)
+                    continue
+                if len(batch) >= UPSERT_BATCH_SIZE:
+                    in_flight.append((asyncio.ensure_future(upsert_batch(batch)), batch))
+                    batch = []
+    if batch:
+        in_flight.append((asyncio.ensure_future(upsert_batch(batch)), batch))
+
+    # Collect batch outcomes; failures are attributed to every record in the
+    # failed batch
+    outcomes = await asyncio.gather(
+        *(task for task, _ in in_flight), return_exceptions=True
+    )
+    for (_, failed_batch), outcome in zip(in_flight, outcomes):
+        if isinstance(outcome, Exception):
+            for _, record in failed_batch:
+                errors.append({
+                    'id': record.get('id'),
+                    'type': record.get('type'),
+                    'error': str(outcome),
+                })
+            logger.warning("Error upserting batch of %d: %s", len(failed_batch), outcome)
+        else:
+            upserted += len(failed_batch)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Upserted batch of %d records", len(failed_batch))
+
+    logger.info("Migration finished: %d/%d upserted, %d errors", upserted, total, len(errors))
 
     return {
         'total': total,
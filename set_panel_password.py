@@ -4,7 +4,7 @@ Set or update the admin panel password in the config table.
 Usage:
     python set_panel_password.py
 
-This script will prompt for a password and store its SHA-256 hash in the config table.
+This script will prompt for a password and store a salted PBKDF2 hash in the config table.
 """
 import os
 import asyncio
@@ -16,9 +16,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+PBKDF2_ITERATIONS = 100_000
+
+
 def hash_password(password: str) -> str:
-    """Hash password using SHA-256."""
-    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+    """Hash password with salted PBKDF2-SHA256, stored as 'salt$digest' hex."""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac(
+        'sha256', password.encode('utf-8'), salt, PBKDF2_ITERATIONS
+    )
+    return f"{salt.hex()}${digest.hex()}"
 
 
 async def set_password():
@@ -7,69 +7,76 @@ import json
 
 BASE_URL = "http://localhost:7860"
 
+# Each query exercises a different tool-selection path in the agent
+QUERIES = [
+    # Temporal query (should use get_records_by_date)
+    "What is my most recent project?",
+    # Semantic query (should use rag_search_by_domain)
+    "Tell me about machine learning projects",
+    # Tag filter query (should use filter_records)
+    "Show me Python projects",
+    # Statistics query (should use get_statistics)
+    "How many projects do I have?",
+    # Combined query (should use multiple tools)
+    "What are my most recent Python projects from 2024?",
+    # Detail query (should use date tool + detail tool)
+    "What's the latest project and give me full details about it?",
+    # Technology distribution (should use get_statistics)
+    "What are my most used technologies?",
+]
 
-async def test_query(question: str, use_agent: bool = True):
+
+async def test_query(client: httpx.AsyncClient, question: str, use_agent: bool = True):
     """Send a query and print the response"""
     print(f"\n{'='*80}")
     print(f"QUERY: {question}")
     print(f"MODE: {'AI Agent' if use_agent else 'Legacy RAG'}")
     print(f"{'='*80}")
-    
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/api/chat",
-                json={"question": question, "use_agent": use_agent}
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"\nANSWER:\n{data.get('answer', 'No answer')}")
-                print(f"\nMODE: {data.get('mode', 'unknown')}")
-                if data.get('tools_used'):
-                    print(f"TOOLS USED: {', '.join(data['tools_used'])}")
-            else:
-                print(f"ERROR: Status {response.status_code}")
-                print(response.text)
-        except Exception as e:
-            print(f"ERROR: {str(e)}")
+
+    try:
+        response = await client.post(
+            "/api/chat",
+            json={"question": question, "use_agent": use_agent}
+        )
+
+        if response.status_code == 200:
+            data = response.json()
+            print(f"\nANSWER:\n{data.get('answer', 'No answer')}")
+            print(f"\nMODE: {data.get('mode', 'unknown')}")
+            if data.get('tools_used'):
+                print(f"TOOLS USED: {', '.join(data['tools_used'])}")
+        else:
+            print(f"ERROR: Status {response.status_code}")
+            print(response.text)
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
 
 
 async def main():
     """Run test queries"""
-    
+
     print("\n" + "="*80)
     print("AI AGENT TEST SUITE")
     print("="*80)
-    
-    # Test 1: Temporal query (should use get_records_by_date)
-    await test_query("What is my most recent project?")
-    await asyncio.sleep(2)
-    
-    # Test 2: Semantic query (should use rag_search_by_domain)
-    await test_query("Tell me about machine learning projects")
-    await asyncio.sleep(2)
-    
-    # Test 3: Tag filter query (should use filter_records)
-    await test_query("Show me Python projects")
-    await asyncio.sleep(2)
-    
-    # Test 4: Statistics query (should use get_statistics)
-    await test_query("How many projects do I have?")
-    await asyncio.sleep(2)
-    
-    # Test 5: Combined query (should use multiple tools)
-    await test_query("What are my most recent Python projects from 2024?")
-    await asyncio.sleep(2)
-    
-    # Test 6: Detail query (should use date tool + detail tool)
-    await test_query("What's the latest project and give me full details about it?")
-    await asyncio.sleep(2)
-    
-    # Test 7: Technology distribution (should use get_statistics)
-    await test_query("What are my most used technologies?")
-    await asyncio.sleep(2)
-    
+
+    # The queries are independent, so run them concurrently over one shared
+    # keep-alive client; the semaphore caps in-flight requests so the server
+    # (and Groq's rate limits) aren't swamped
+    sem = asyncio.Semaphore(4)
+
+    async def run(client, question):
+        async with sem:
+            await test_query(client, question)
+
+    # Stage-specific timeouts: the long 60s budget applies only to reading the
+    # (LLM-backed) response, not to connecting or waiting on the pool
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=httpx.Timeout(connect=3.0, read=60.0, write=10.0, pool=5.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    ) as client:
+        await asyncio.gather(*(run(client, q) for q in QUERIES))
+
     print("\n" + "="*80)
     print("TEST SUITE COMPLETED")
     print("="*80)
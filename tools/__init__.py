@@ -1,11 +1,18 @@
 """Tools package for AI Agent"""
 
+from importlib import import_module
+
 from .base import Tool, ToolResult
-from .rag_search_tool import RAGSearchTool
-from .date_query_tool import DateQueryTool
-from .filter_tool import FilterTool
-from .detail_tool import DetailTool
-from .stats_tool import StatsTool
+
+# Tool classes load lazily (PEP 562) so entry points that never touch a given
+# tool don't pay for its imports (e.g. RAGSearchTool pulls in httpx)
+_LAZY = {
+    'RAGSearchTool': '.rag_search_tool',
+    'DateQueryTool': '.date_query_tool',
+    'FilterTool': '.filter_tool',
+    'DetailTool': '.detail_tool',
+    'StatsTool': '.stats_tool',
+}
 
 __all__ = [
     'Tool',
@@ -16,3 +23,11 @@ __all__ = [
     'DetailTool',
     'StatsTool',
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value  # cache so later lookups skip this hook
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,71 @@
 """Base classes for AI Agent tools"""
 
+import json
+from dataclasses import dataclass, field, asdict
 from typing import Dict, Any, Optional
-from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-class ToolResult(BaseModel):
-    """Result from tool execution"""
+
+@dataclass(slots=True)
+class ToolResult:
+    """Result from tool execution.
+
+    A plain dataclass rather than a pydantic model: tools construct these on
+    every call with already-known types, so validation is pure overhead, and
+    __slots__ keeps per-instance memory down.
+    """
     success: bool
     data: Any
     error: Optional[str] = None
-    metadata: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def dict(self) -> Dict[str, Any]:
+        """Plain-dict view (keeps the pydantic-era call sites working)."""
+        return asdict(self)
+
+    def to_json(self) -> str:
+        """JSON-encode for the agent tool-call boundary.
+
+        Uses orjson's C encoder when installed (result payloads of 50 records
+        are the dominant CPU cost after the DB call); falls back to stdlib
+        json otherwise.
+        """
+        if orjson is not None:
+            return orjson.dumps(asdict(self)).decode()
+        return json.dumps(asdict(self), default=str)
+
+
+def format_record_row(row) -> Dict[str, Any]:
+    """
+    Build the standard result dict for a `records` row (summary excluded).
+
+    Shared by the DB-backed tools so the shape stays identical across them.
+    Rows must be selected in the canonical column order:
+    id, type, title, tags, start_date, end_date, priority, facts,
+    detail_site, additional_url.
+
+    Unpacks the Record positionally (C-level tuple iteration) instead of ten
+    keyed __getitem__ calls; asyncpg already decodes text[] columns to lists.
+    Dates are selected via to_char so they arrive as 'YYYY-MM-DD' strings
+    (or None) and pass straight through.
+    """
+    rid, rtype, title, tags, sdate, edate, prio, facts, dsite, aurl = row
+    return {
+        "id": rid,
+        "type": rtype,
+        "title": title,
+        "tags": tags or [],
+        "priority": prio,
+        "facts": facts or [],
+        "detail_site": dsite,
+        "additional_url": aurl,
+        "start_date": sdate,
+        "end_date": edate
+    }
 
 
 class Tool:
@@ -26,7 +82,7 @@ class Tool:
     def __init__(self, db_pool=None):
         """
         Initialize tool with database connection pool
-        
+
         Args:
             db_pool: asyncpg connection pool for database queries
         """
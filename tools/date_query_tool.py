@@ -2,7 +2,54 @@
 
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from .base import Tool, ToolResult
+from .base import Tool, ToolResult, format_record_row
+
+
+# Base SELECT - exclude summary, include detail_site and additional_url.
+# Dates come back pre-formatted as text so no datetime objects are built
+# (or isoformat()ed) per row.
+_BASE_SELECT = "SELECT id, type, title, tags, to_char(start_date, 'YYYY-MM-DD') AS start_date, to_char(end_date, 'YYYY-MM-DD') AS end_date, priority, facts, detail_site, additional_url FROM records WHERE 1=1"
+
+_FILTER_CLAUSES = (
+    "type =",
+    "start_date >=",
+    "start_date <=",
+    "end_date >=",
+    "end_date <=",
+)
+
+# sort_order never reaches the SQL as raw text: templates are generated from
+# this whitelist and lookups raise on anything else
+_ORDER_SQL = {
+    "DESC": " ORDER BY start_date DESC, priority DESC",
+    "ASC": " ORDER BY start_date ASC, priority DESC",
+}
+
+
+def _build_sql_templates():
+    """Precompute SQL for every shape (2^5 filter combos x 2 sort orders).
+
+    Keyed by (filter presence flags..., sort_order); building all 64 variants
+    once at import removes per-call string assembly and keeps the SQL text
+    identical per shape so asyncpg's statement cache reuses the plan.
+    """
+    templates = {}
+    for mask in range(1 << len(_FILTER_CLAUSES)):
+        flags = tuple(bool(mask & (1 << i)) for i in range(len(_FILTER_CLAUSES)))
+        for sort_order, order_sql in _ORDER_SQL.items():
+            query = _BASE_SELECT
+            param_idx = 1
+            for present, clause in zip(flags, _FILTER_CLAUSES):
+                if present:
+                    query += f" AND {clause} ${param_idx}"
+                    param_idx += 1
+            query += order_sql
+            query += f" LIMIT ${param_idx}"
+            templates[flags + (sort_order,)] = query
+    return templates
+
+
+_SQL_TEMPLATES = _build_sql_templates()
 
 
 class DateQueryTool(Tool):
@@ -93,64 +140,27 @@ by start_date in the specified order (DESC = newest first, ASC = oldest first).
             ToolResult with matching records sorted by date
         """
         try:
-            # Build SQL query - exclude summary, include detail_site and additional_url
-            query = "SELECT id, type, title, tags, start_date, end_date, priority, facts, detail_site, additional_url FROM records WHERE 1=1"
-            params = []
-            param_idx = 1
-            
-            # Add type filter
-            if record_type:
-                query += f" AND type = ${param_idx}"
-                params.append(record_type)
-                param_idx += 1
-            
-            # Add date filters
-            if start_date_after:
-                query += f" AND start_date >= ${param_idx}"
-                params.append(start_date_after)
-                param_idx += 1
-            
-            if start_date_before:
-                query += f" AND start_date <= ${param_idx}"
-                params.append(start_date_before)
-                param_idx += 1
-            
-            if end_date_after:
-                query += f" AND end_date >= ${param_idx}"
-                params.append(end_date_after)
-                param_idx += 1
-            
-            if end_date_before:
-                query += f" AND end_date <= ${param_idx}"
-                params.append(end_date_before)
-                param_idx += 1
-            
-            # Add sorting and limit
-            query += f" ORDER BY start_date {sort_order}, priority DESC"
-            query += f" LIMIT ${param_idx}"
+            if sort_order not in _ORDER_SQL:
+                raise ValueError(f"Invalid sort_order: {sort_order!r}")
+
+            # Look up the precompiled SQL for this shape; only the params list
+            # is built per call
+            values = (record_type, start_date_after, start_date_before,
+                      end_date_after, end_date_before)
+            params = [v for v in values if v]
             params.append(limit)
+
+            shape = tuple(bool(v) for v in values) + (sort_order,)
+            query = _SQL_TEMPLATES[shape]
             
-            # Execute query
-            async with self.db_pool.acquire() as conn:
-                rows = await conn.fetch(query, *params)
-            
-            # Format results - exclude summary
+            # Stream rows with a server-side cursor and format in one pass,
+            # instead of materializing the full row list first
             results = []
-            for row in rows:
-                result_data = {
-                    "id": row["id"],
-                    "type": row["type"],
-                    "title": row["title"],
-                    "tags": list(row["tags"]) if row["tags"] else [],
-                    "priority": row["priority"],
-                    "facts": list(row["facts"]) if row["facts"] else [],
-                    "detail_site": row["detail_site"],
-                    "additional_url": row["additional_url"],
-                    "start_date": row["start_date"].isoformat() if row["start_date"] else None,
-                    "end_date": row["end_date"].isoformat() if row["end_date"] else None
-                }
-                results.append(result_data)
-            
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    async for row in conn.cursor(query, *params, prefetch=limit):
+                        results.append(format_record_row(row))
+
             return ToolResult(
                 success=True,
                 data=results,
@@ -1,7 +1,23 @@
 """Detail Tool - Fetch full record details by ID"""
 
+import copy
 from typing import Optional
-from .base import Tool, ToolResult
+from .base import Tool, ToolResult, format_record_row
+from ._cache import SmartCache
+
+
+# Static single-row lookup - exclude summary. Kept as a module constant so
+# every call sends identical SQL text and asyncpg's statement cache reuses
+# the server-side prepared plan. Columns follow the canonical order expected
+# by format_record_row.
+DETAIL_SQL = """
+    SELECT id, type, title, tags,
+           to_char(start_date, 'YYYY-MM-DD') AS start_date,
+           to_char(end_date, 'YYYY-MM-DD') AS end_date,
+           priority, facts, detail_site, additional_url
+    FROM records
+    WHERE id = $1
+"""
 
 
 class DetailTool(Tool):
@@ -31,7 +47,17 @@ about a specific record identified in a previous tool call.
         },
         "required": ["record_id"]
     }
-    
+
+    def __init__(self, db_pool=None):
+        super().__init__(db_pool)
+        # The agent often re-fetches the same record across turns; a short
+        # TTL keeps repeat lookups off the DB without serving stale edits
+        self._cache = SmartCache(maxsize=256, ttl=60)
+
+    def invalidate(self, record_id: str) -> None:
+        """Drop a cached record (call from write paths after updates)."""
+        self._cache.delete(record_id)
+
     async def execute(self, record_id: str) -> ToolResult:
         """
         Fetch complete record details
@@ -43,16 +69,16 @@ about a specific record identified in a previous tool call.
             ToolResult with full record data
         """
         try:
-            # Query for full record - exclude summary
-            query = """
-                SELECT id, type, title, tags, detail_site, additional_url,
-                       start_date, end_date, priority, facts
-                FROM records 
-                WHERE id = $1
-            """
-            
+            cached = self._cache.get(record_id)
+            if cached is not None:
+                return ToolResult(
+                    success=True,
+                    data=copy.deepcopy(cached[0]),
+                    metadata=copy.deepcopy(cached[1])
+                )
+
             async with self.db_pool.acquire() as conn:
-                row = await conn.fetchrow(query, record_id)
+                row = await conn.fetchrow(DETAIL_SQL, record_id)
             
             if not row:
                 return ToolResult(
@@ -62,27 +88,19 @@ about a specific record identified in a previous tool call.
                 )
             
             # Format result with all fields - exclude summary
-            result_data = {
-                "id": row["id"],
-                "type": row["type"],
-                "title": row["title"],
-                "tags": list(row["tags"]) if row["tags"] else [],
-                "priority": row["priority"],
-                "facts": list(row["facts"]) if row["facts"] else [],
-                "detail_site": row["detail_site"],
-                "additional_url": row["additional_url"],
-                "start_date": row["start_date"].isoformat() if row["start_date"] else None,
-                "end_date": row["end_date"].isoformat() if row["end_date"] else None
+            result_data = format_record_row(row)
+
+            result_metadata = {
+                "record_id": record_id,
+                "has_detail_site": bool(row["detail_site"]),
+                "has_additional_urls": bool(row["additional_url"])
             }
-            
+            self._cache.set(record_id, (result_data, result_metadata))
+
             return ToolResult(
                 success=True,
                 data=result_data,
-                metadata={
-                    "record_id": record_id,
-                    "has_detail_site": bool(row["detail_site"]),
-                    "has_additional_urls": bool(row["additional_url"])
-                }
+                metadata=result_metadata
             )
             
         except Exception as e:
@@ -1,7 +1,48 @@
 """Filter Tool - Type, tags, and priority filtering"""
 
 from typing import Optional, List, Dict, Any
-from .base import Tool, ToolResult
+from .base import Tool, ToolResult, format_record_row
+
+
+# Base SELECT - exclude summary, include detail_site and additional_url.
+# Dates come back pre-formatted as text so no datetime objects are built
+# (or isoformat()ed) per row.
+_BASE_SELECT = "SELECT id, type, title, tags, to_char(start_date, 'YYYY-MM-DD') AS start_date, to_char(end_date, 'YYYY-MM-DD') AS end_date, priority, facts, detail_site, additional_url FROM records WHERE 1=1"
+
+
+def _build_sql_templates():
+    """Precompute SQL for every shape (2^4 filter combos x tags_match_all).
+
+    Keyed by (filter presence flags..., tags_match_all). @> requires ALL tags
+    present, && matches ANY overlapping tag. Building the 32 variants once at
+    import removes per-call string assembly and keeps SQL text identical per
+    shape so asyncpg's statement cache reuses the plan.
+    """
+    templates = {}
+    for mask in range(1 << 4):
+        flags = tuple(bool(mask & (1 << i)) for i in range(4))
+        has_type, has_tags, has_min, has_max = flags
+        for match_all in (False, True):
+            clauses = (
+                (has_type, "type = ${}"),
+                (has_tags, "tags @> ${}::text[]" if match_all else "tags && ${}::text[]"),
+                (has_min, "priority >= ${}"),
+                (has_max, "priority <= ${}"),
+            )
+            query = _BASE_SELECT
+            param_idx = 1
+            for present, clause in clauses:
+                if present:
+                    query += " AND " + clause.format(param_idx)
+                    param_idx += 1
+            # Sort by priority (high to low), then by date (recent first)
+            query += " ORDER BY priority DESC, start_date DESC NULLS LAST"
+            query += f" LIMIT ${param_idx}"
+            templates[flags + (match_all,)] = query
+    return templates
+
+
+_SQL_TEMPLATES = _build_sql_templates()
 
 
 class FilterTool(Tool):
@@ -89,68 +130,34 @@ Returns matching records sorted by priority and date.
             ToolResult with matching records
         """
         try:
-            # Build SQL query - exclude summary, include detail_site and additional_url
-            query = "SELECT id, type, title, tags, start_date, end_date, priority, facts, detail_site, additional_url FROM records WHERE 1=1"
+            # Look up the precompiled SQL for this shape; only the params list
+            # is built per call
             params = []
-            param_idx = 1
-            
-            # Add type filter
-            if record_type:
-                query += f" AND type = ${param_idx}"
+            if record_type is not None:
                 params.append(record_type)
-                param_idx += 1
-            
-            # Add tag filters
             if tags:
-                if tags_match_all:
-                    # Record must contain ALL tags
-                    query += f" AND tags @> ${param_idx}::text[]"
-                    params.append(tags)
-                else:
-                    # Record must contain ANY tag
-                    query += f" AND tags && ${param_idx}::text[]"
-                    params.append(tags)
-                param_idx += 1
-            
-            # Add priority filters
+                params.append(tags)
             if priority_min is not None:
-                query += f" AND priority >= ${param_idx}"
                 params.append(priority_min)
-                param_idx += 1
-            
             if priority_max is not None:
-                query += f" AND priority <= ${param_idx}"
                 params.append(priority_max)
-                param_idx += 1
-            
-            # Sort by priority (high to low), then by date (recent first)
-            query += " ORDER BY priority DESC, start_date DESC NULLS LAST"
-            
-            # Add limit
-            query += f" LIMIT ${param_idx}"
             params.append(limit)
+
+            shape = (
+                record_type is not None, bool(tags),
+                priority_min is not None, priority_max is not None,
+                tags_match_all,
+            )
+            query = _SQL_TEMPLATES[shape]
             
-            # Execute query
-            async with self.db_pool.acquire() as conn:
-                rows = await conn.fetch(query, *params)
-            
-            # Format results - exclude summary
+            # Stream rows with a server-side cursor and format in one pass,
+            # instead of materializing the full row list first
             results = []
-            for row in rows:
-                result_data = {
-                    "id": row["id"],
-                    "type": row["type"],
-                    "title": row["title"],
-                    "tags": list(row["tags"]) if row["tags"] else [],
-                    "priority": row["priority"],
-                    "facts": list(row["facts"]) if row["facts"] else [],
-                    "detail_site": row["detail_site"],
-                    "additional_url": row["additional_url"],
-                    "start_date": row["start_date"].isoformat() if row["start_date"] else None,
-                    "end_date": row["end_date"].isoformat() if row["end_date"] else None
-                }
-                results.append(result_data)
-            
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    async for row in conn.cursor(query, *params, prefetch=limit):
+                        results.append(format_record_row(row))
+
             return ToolResult(
                 success=True,
                 data=results,
@@ -1,10 +1,30 @@
 """RAG Search Tool - Semantic vector search with domain filtering"""
 
 import os
-import asyncio
+import copy
+import httpx
 from typing import Optional, List, Dict, Any
-from upstash_vector import Index
 from .base import Tool, ToolResult
+from ._cache import SmartCache
+
+
+# Degenerate queries the agent loop occasionally emits; searching these wastes
+# a full embed + ANN round-trip for meaningless matches
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "my", "of", "on", "or", "the", "to", "was", "what", "with",
+})
+
+# Upper bound on query text sent to the embedder
+MAX_QUERY_CHARS = 512
+
+# Filter expression per domain, built once; "all" maps to no filter. Keeps the
+# hot path free of per-call f-string assembly and guarantees the server sees
+# the same filter text (and cached parse) for a given domain.
+_DOMAIN_FILTERS = {
+    domain: f"type = '{domain}'"
+    for domain in ("project", "education", "experience", "fact")
+}
 
 
 class RAGSearchTool(Tool):
@@ -58,15 +78,43 @@ Returns top_k most relevant results sorted by similarity score.
     
     def __init__(self, db_pool=None):
         super().__init__(db_pool)
-        self.index = Index(
-            url=os.getenv("UPSTASH_VECTOR_REST_URL"),
-            token=os.getenv("UPSTASH_VECTOR_REST_TOKEN")
+        # Talk to the Upstash REST API with a pooled async client instead of
+        # the sync SDK via asyncio.to_thread - no thread-pool hop per query,
+        # and parallel searches from the agent don't serialize on the GIL
+        self._client = httpx.AsyncClient(
+            base_url=os.getenv("UPSTASH_VECTOR_REST_URL") or "",
+            headers={
+                "Authorization": f"Bearer {os.getenv('UPSTASH_VECTOR_REST_TOKEN')}"
+            },
+            timeout=httpx.Timeout(connect=3.0, read=30.0, write=10.0, pool=5.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
         )
+        # Repeated queries skip the Upstash round-trip entirely; stats are
+        # available via self._cache.stats()
+        self._cache = SmartCache(maxsize=512, ttl=300)
     
+    @staticmethod
+    def _format_result(r: Dict[str, Any]) -> Dict[str, Any]:
+        """Format one REST query match - exclude summary, keep needed fields"""
+        metadata = r.get("metadata") or {}
+        return {
+            "id": r.get("id"),
+            "score": r.get("score"),
+            "type": metadata.get("type", "unknown"),
+            "title": metadata.get("title", "Untitled"),
+            "tags": metadata.get("tags", []),
+            "priority": metadata.get("priority", 3),
+            "facts": metadata.get("facts", []),
+            "detail_site": metadata.get("detail_site", ""),
+            "additional_url": metadata.get("additional_url", []),
+            "start_date": metadata.get("start_date"),
+            "end_date": metadata.get("end_date")
+        }
+
     async def execute(
-        self, 
-        query: str, 
-        domain: str = "all", 
+        self,
+        query: str,
+        domain: str = "all",
         top_k: int = 5
     ) -> ToolResult:
         """
@@ -80,52 +128,157 @@ Returns top_k most relevant results sorted by similarity score.
         Returns:
             ToolResult with matching records sorted by relevance
         """
-        try:
-            # Build metadata filter if domain specified
-            filter_str = None
-            if domain != "all":
-                filter_str = f"type = '{domain}'"
-            
-            # Execute vector search
-            results = await asyncio.to_thread(
-                self.index.query,
-                data=query,
-                top_k=top_k,
-                include_metadata=True,
-                filter=filter_str
+        # Skip the vector round-trip for queries that can't match anything
+        # meaningful: empty/near-empty strings or pure stopword sequences
+        query = query.strip()
+        if len(query) < 2 or all(
+            token in _STOPWORDS for token in query.lower().split()
+        ):
+            return ToolResult(
+                success=True,
+                data=[],
+                metadata={"query": query, "domain": domain, "results_count": 0,
+                          "skipped": "degenerate query"}
             )
-            
+        if len(query) > MAX_QUERY_CHARS:
+            query = query[:MAX_QUERY_CHARS]
+
+        try:
+            # Exact-match cache lookup; results are copied so callers can
+            # mutate them without corrupting the cached entry
+            cache_key = (query.lower(), domain, top_k)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return ToolResult(
+                    success=True,
+                    data=copy.deepcopy(cached[0]),
+                    metadata=copy.deepcopy(cached[1])
+                )
+
+            # Attach the precomputed metadata filter if domain specified
+            payload = {
+                "data": query,
+                "topK": top_k,
+                "includeMetadata": True,
+            }
+            domain_filter = _DOMAIN_FILTERS.get(domain)
+            if domain_filter:
+                payload["filter"] = domain_filter
+
+            # Execute vector search; /query-data embeds the raw text
+            # server-side (the REST path behind the SDK's query(data=...)),
+            # whereas /query expects a precomputed vector
+            response = await self._client.post("/query-data", json=payload)
+            response.raise_for_status()
+            results = response.json().get("result", [])
+
             # Format results - exclude summary, include all necessary fields
-            formatted_results = []
-            for r in results:
-                result_data = {
-                    "id": r.id,
-                    "score": r.score,
-                    "type": r.metadata.get("type", "unknown"),
-                    "title": r.metadata.get("title", "Untitled"),
-                    "tags": r.metadata.get("tags", []),
-                    "priority": r.metadata.get("priority", 3),
-                    "facts": r.metadata.get("facts", []),
-                    "detail_site": r.metadata.get("detail_site", ""),
-                    "additional_url": r.metadata.get("additional_url", []),
-                    "start_date": r.metadata.get("start_date"),
-                    "end_date": r.metadata.get("end_date")
-                }
-                formatted_results.append(result_data)
-            
+            formatted_results = [self._format_result(r) for r in results]
+
+            result_metadata = {
+                "query": query,
+                "domain": domain,
+                "results_count": len(formatted_results)
+            }
+            self._cache.set(cache_key, (formatted_results, result_metadata))
+
             return ToolResult(
                 success=True,
                 data=formatted_results,
+                metadata=result_metadata
+            )
+
+        except Exception as e:
+            return ToolResult(
+                success=False,
+                data=[],
+                error=f"RAG search failed: {str(e)}"
+            )
+
+    async def execute_multi(self, queries: List[Dict[str, Any]]) -> ToolResult:
+        """
+        Run several searches in one batched /query-data round-trip.
+
+        Each sub-query goes through the same guards as execute(): degenerate
+        queries and cache hits are served locally, only the remainder is
+        batched, and batch results are written back to the cache so later
+        single-query turns hit it too.
+
+        Args:
+            queries: list of dicts with the same keys as execute()
+                     (query required; domain and top_k optional)
+
+        Returns:
+            ToolResult whose data is one formatted result list per query,
+            in input order
+        """
+        try:
+            results: List[Optional[List[Dict[str, Any]]]] = [None] * len(queries)
+            to_batch = []  # (position, query, domain, top_k, cache_key)
+
+            for i, q in enumerate(queries):
+                query = (q.get("query") or "").strip()
+                domain = q.get("domain", "all")
+                top_k = q.get("top_k", 5)
+                if len(query) < 2 or all(
+                    token in _STOPWORDS for token in query.lower().split()
+                ):
+                    results[i] = []
+                    continue
+                if len(query) > MAX_QUERY_CHARS:
+                    query = query[:MAX_QUERY_CHARS]
+                cache_key = (query.lower(), domain, top_k)
+                cached = self._cache.get(cache_key)
+                if cached is not None:
+                    results[i] = copy.deepcopy(cached[0])
+                    continue
+                to_batch.append((i, query, domain, top_k, cache_key))
+
+            if to_batch:
+                payload = []
+                for _, query, domain, top_k, _ in to_batch:
+                    entry = {
+                        "data": query,
+                        "topK": top_k,
+                        "includeMetadata": True,
+                    }
+                    domain_filter = _DOMAIN_FILTERS.get(domain)
+                    if domain_filter:
+                        entry["filter"] = domain_filter
+                    payload.append(entry)
+
+                # Batching is an array body to /query-data (there is no
+                # separate batch endpoint); one HTTP round-trip, and Upstash
+                # fans the sub-queries out in parallel
+                response = await self._client.post("/query-data", json=payload)
+                response.raise_for_status()
+                batches = response.json().get("result", [])
+
+                for (i, query, domain, top_k, cache_key), batch in zip(
+                    to_batch, batches
+                ):
+                    formatted = [self._format_result(r) for r in batch or []]
+                    self._cache.set(cache_key, (formatted, {
+                        "query": query,
+                        "domain": domain,
+                        "results_count": len(formatted)
+                    }))
+                    results[i] = formatted
+
+            formatted_batches = [r if r is not None else [] for r in results]
+
+            return ToolResult(
+                success=True,
+                data=formatted_batches,
                 metadata={
-                    "query": query,
-                    "domain": domain,
-                    "results_count": len(formatted_results)
+                    "queries_count": len(queries),
+                    "results_count": sum(len(b) for b in formatted_batches)
                 }
             )
-            
+
         except Exception as e:
             return ToolResult(
                 success=False,
                 data=[],
-                error=f"RAG search failed: {str(e)}"
+                error=f"Batch RAG search failed: {str(e)}"
             )
@@ -1,7 +1,161 @@
 """Statistics Tool - Aggregate queries and statistics"""
 
+import copy
+import asyncio
+import asyncpg
 from typing import Optional, Dict, Any, List
 from .base import Tool, ToolResult
+from ._cache import SmartCache
+
+
+# Unfiltered tag/type distributions read the trigger-maintained counter
+# tables from db_create_stats_counters.py - a range scan over a handful of
+# rows, independent of the records table size.
+TAG_COUNTS_SQL = """
+    SELECT tag, n as count
+    FROM tag_counts
+    WHERE n > 0
+    ORDER BY n DESC
+    LIMIT $1
+"""
+
+TYPE_COUNTS_SQL = """
+    SELECT type, n as count
+    FROM type_counts
+    WHERE n > 0
+    ORDER BY n DESC
+"""
+
+# Fast paths over the materialized views created by db_create_stats_views.py.
+# The views are keyed by (type, tag) and (type, year), so they only apply when
+# the remaining filters fit those keys; execute() falls back to the live
+# aggregates when a view is missing or a filter can't be pushed down.
+MV_TAGS_SQL = """
+    SELECT tag, SUM(count)::bigint AS count
+    FROM mv_tag_counts
+    WHERE ($1::text IS NULL OR type = $1)
+    GROUP BY tag
+    ORDER BY count DESC
+    LIMIT $2
+"""
+
+MV_TIMELINE_SQL = """
+    SELECT year, count, titles
+    FROM mv_year_counts
+    WHERE ($1::text IS NULL OR type = $1)
+      AND ($2::integer IS NULL OR year >= $2)
+      AND ($3::integer IS NULL OR year <= $3)
+    ORDER BY year DESC
+"""
+
+# Live aggregates with fixed filter slots: every call sends the same SQL text
+# with NULL for unused filters, so asyncpg's statement cache reuses the
+# server-side plan instead of re-parsing a freshly assembled WHERE clause.
+# The ::int cast on the year expression matches records_start_year_idx
+# (see db_add_stats_indexes.py) so the planner can range-scan it.
+_FILTER_SLOTS = """($1::text IS NULL OR type = $1)
+      AND ($2::text[] IS NULL OR tags && $2)
+      AND ($3::integer IS NULL OR EXTRACT(YEAR FROM start_date)::int >= $3)
+      AND ($4::integer IS NULL OR EXTRACT(YEAR FROM start_date)::int <= $4)"""
+
+COUNT_SQL = f"""
+    SELECT COUNT(*) as count
+    FROM records
+    WHERE {_FILTER_SLOTS}
+"""
+
+# Count fast path for tag filters: the GROUP BY id form lets the planner
+# resolve the filter from the GIN bitmap plus the primary-key index without
+# counting heap tuples row by row. Unfiltered counts stay exact COUNT(*) -
+# on a table this size that is microseconds, and planner estimates would
+# serve stale totals between ANALYZE runs.
+COUNT_BY_TAGS_SQL = f"""
+    SELECT COUNT(*) as count FROM (
+        SELECT id
+        FROM records
+        WHERE {_FILTER_SLOTS}
+        GROUP BY id
+    ) s
+"""
+
+TAGS_DISTRIBUTION_SQL = f"""
+    SELECT unnest(tags) as tag, COUNT(*) as count
+    FROM records
+    WHERE {_FILTER_SLOTS}
+    GROUP BY tag
+    ORDER BY count DESC
+    LIMIT $5
+"""
+
+# Timeline is answered from two independent statements issued concurrently
+# on separate pool connections and merged by year client-side. Counts group
+# without aggregating titles; the titles query LATERAL-joins a LIMIT-5
+# subquery per surviving year (top-K via the composite index from
+# db_add_stats_indexes.py) instead of array_agg'ing and sorting every title
+# in every bucket.
+TIMELINE_COUNTS_SQL = f"""
+    SELECT
+        EXTRACT(YEAR FROM start_date)::int as year,
+        COUNT(*) as count
+    FROM records
+    WHERE {_FILTER_SLOTS} AND start_date IS NOT NULL
+    GROUP BY year
+    ORDER BY year DESC
+    LIMIT $5
+"""
+
+TIMELINE_TITLES_SQL = f"""
+    SELECT y.year, l.titles
+    FROM (
+        SELECT DISTINCT EXTRACT(YEAR FROM start_date)::int as year
+        FROM records
+        WHERE {_FILTER_SLOTS} AND start_date IS NOT NULL
+        ORDER BY year DESC
+        LIMIT $5
+    ) y,
+    LATERAL (
+        SELECT array_agg(t.title) as titles
+        FROM (
+            SELECT title
+            FROM records r
+            WHERE EXTRACT(YEAR FROM r.start_date)::int = y.year
+              AND ($1::text IS NULL OR r.type = $1)
+              AND ($2::text[] IS NULL OR r.tags && $2)
+            ORDER BY r.start_date DESC
+            LIMIT 5
+        ) t
+    ) l
+"""
+
+TYPES_DISTRIBUTION_SQL = f"""
+    SELECT type, COUNT(*) as count
+    FROM records
+    WHERE {_FILTER_SLOTS}
+    GROUP BY type
+    ORDER BY count DESC
+"""
+
+# The type column only takes these values, so the unfiltered distribution
+# is four COUNT(*) lookups; each lands index-only on its partial index
+# (db_add_stats_indexes.py) instead of a seq scan + hash aggregate.
+RECORD_TYPES = ("project", "education", "experience", "fact")
+
+TYPES_FAST_SQL = "\n    UNION ALL\n".join(
+    f"    SELECT '{t}' as type, COUNT(*) as count FROM records WHERE type = '{t}'"
+    for t in RECORD_TYPES
+)
+
+# Hot statements worth preparing at pool init (see main._warm_connection).
+# PreparedStatement objects are bound to one connection, so warming works
+# by preparing the same SQL text on each connection and letting asyncpg's
+# per-connection statement cache serve later calls.
+WARM_SQL = (
+    COUNT_SQL,
+    TAGS_DISTRIBUTION_SQL,
+    TIMELINE_COUNTS_SQL,
+    TIMELINE_TITLES_SQL,
+    TYPES_DISTRIBUTION_SQL,
+)
 
 
 class StatsTool(Tool):
@@ -66,7 +220,19 @@ Type of statistic to compute:
         },
         "required": ["stat_type"]
     }
-    
+
+    def __init__(self, db_pool=None):
+        super().__init__(db_pool)
+        # Chats repeat identical stat requests ("how many projects?"); the
+        # TTL matches the 5-minute system-prompt cache used elsewhere
+        self._cache = SmartCache(maxsize=256, ttl=300)
+        # Per-key locks so concurrent identical requests coalesce into one query
+        self._inflight: Dict[Any, asyncio.Lock] = {}
+
+    def invalidate(self) -> None:
+        """Drop all cached statistics (call from write paths after record changes)."""
+        self._cache.clear()
+
     async def execute(
         self,
         stat_type: str,
@@ -78,7 +244,7 @@ Type of statistic to compute:
     ) -> ToolResult:
         """
         Execute statistics query
-        
+
         Args:
             stat_type: Type of statistic (count, tags_distribution, timeline, types_distribution)
             record_type: Filter by type
@@ -86,105 +252,176 @@ Type of statistic to compute:
             start_year: Filter by start year (>=)
             end_year: Filter by end year (<=)
             top_n: For distributions, return top N results
-            
+
         Returns:
             ToolResult with computed statistics
         """
+        cache_key = (
+            stat_type,
+            record_type,
+            tuple(sorted(tags)) if tags else None,
+            start_year,
+            end_year,
+            top_n,
+        )
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return ToolResult(
+                success=True,
+                data=copy.deepcopy(cached[0]),
+                metadata=copy.deepcopy(cached[1])
+            )
+
+        lock = self._inflight.setdefault(cache_key, asyncio.Lock())
         try:
-            # Build base WHERE clause for filters
-            where_clauses = []
-            params = []
-            param_idx = 1
-            
-            if record_type:
-                where_clauses.append(f"type = ${param_idx}")
-                params.append(record_type)
-                param_idx += 1
-            
-            if tags:
-                where_clauses.append(f"tags && ${param_idx}::text[]")
-                params.append(tags)
-                param_idx += 1
-            
-            if start_year:
-                where_clauses.append(f"EXTRACT(YEAR FROM start_date) >= ${param_idx}")
-                params.append(start_year)
-                param_idx += 1
-            
-            if end_year:
-                where_clauses.append(f"EXTRACT(YEAR FROM start_date) <= ${param_idx}")
-                params.append(end_year)
-                param_idx += 1
-            
-            where_clause = " AND ".join(where_clauses) if where_clauses else "1=1"
-            
-            # Execute appropriate query based on stat_type
-            async with self.db_pool.acquire() as conn:
-                if stat_type == "count":
-                    query = f"SELECT COUNT(*) as count FROM records WHERE {where_clause}"
-                    row = await conn.fetchrow(query, *params)
-                    result_data = {"count": row["count"]}
-                
-                elif stat_type == "tags_distribution":
-                    query = f"""
-                        SELECT unnest(tags) as tag, COUNT(*) as count
-                        FROM records 
-                        WHERE {where_clause}
-                        GROUP BY tag
-                        ORDER BY count DESC
-                        LIMIT ${param_idx}
-                    """
-                    params.append(top_n)
-                    rows = await conn.fetch(query, *params)
-                    result_data = {
-                        "tags": [{"tag": row["tag"], "count": row["count"]} for row in rows],
-                        "total_unique_tags": len(rows)
-                    }
-                
-                elif stat_type == "timeline":
-                    query = f"""
-                        SELECT 
-                            EXTRACT(YEAR FROM start_date)::integer as year,
-                            COUNT(*) as count,
-                            array_agg(title ORDER BY start_date DESC) as titles
-                        FROM records 
-                        WHERE {where_clause} AND start_date IS NOT NULL
-                        GROUP BY year
-                        ORDER BY year DESC
-                        LIMIT ${param_idx}
-                    """
-                    params.append(top_n)
-                    rows = await conn.fetch(query, *params)
-                    result_data = {
-                        "timeline": [
-                            {
-                                "year": row["year"],
-                                "count": row["count"],
-                                "titles": list(row["titles"])
-                            } 
-                            for row in rows
-                        ]
-                    }
-                
-                elif stat_type == "types_distribution":
-                    query = f"""
-                        SELECT type, COUNT(*) as count
-                        FROM records 
-                        WHERE {where_clause}
-                        GROUP BY type
-                        ORDER BY count DESC
-                    """
-                    rows = await conn.fetch(query, *params)
-                    result_data = {
-                        "types": [{"type": row["type"], "count": row["count"]} for row in rows]
-                    }
-                
-                else:
+            async with lock:
+                # A concurrent duplicate may have populated the cache while
+                # this request waited on the lock
+                cached = self._cache.get(cache_key)
+                if cached is not None:
                     return ToolResult(
-                        success=False,
-                        data=None,
-                        error=f"Unknown stat_type: {stat_type}"
+                        success=True,
+                        data=copy.deepcopy(cached[0]),
+                        metadata=copy.deepcopy(cached[1])
+                    )
+                result = await self._compute(
+                    stat_type, record_type, tags, start_year, end_year, top_n
+                )
+                if result.success:
+                    self._cache.set(cache_key, (result.data, result.metadata))
+                return result
+        finally:
+            self._inflight.pop(cache_key, None)
+
+    async def _timeline(self, params: tuple, top_n: int) -> List[Dict[str, Any]]:
+        """Compute the timeline stat.
+
+        Every fetch here is pool-level - each acquires and releases its own
+        connection - so no connection is ever held while waiting on another
+        and a drained pool makes concurrent misses queue, not deadlock.
+        """
+        record_type, tags, start_year, end_year = params
+
+        if not tags:
+            try:
+                mv_rows = await self.db_pool.fetch(
+                    MV_TIMELINE_SQL, record_type, start_year, end_year
+                )
+            except asyncpg.UndefinedTableError:
+                # View not created yet - use the live aggregate
+                mv_rows = None
+            if mv_rows is not None:
+                # Merge the per-(type, year) rows by year
+                by_year = {}
+                for row in mv_rows:
+                    entry = by_year.setdefault(
+                        row["year"],
+                        {"year": row["year"], "count": 0, "titles": []}
                     )
+                    entry["count"] += row["count"]
+                    entry["titles"].extend(row["titles"])
+                timeline = []
+                for year in sorted(by_year, reverse=True)[:top_n]:
+                    entry = by_year[year]
+                    # Titles merged across types can exceed the per-year
+                    # cap; one slice keeps it at 5
+                    entry["titles"] = entry["titles"][:5]
+                    timeline.append(entry)
+                return timeline
+
+        # Counts and titles are independent; overlap them on two short-lived
+        # pool connections and merge by year
+        count_rows, title_rows = await asyncio.gather(
+            self.db_pool.fetch(TIMELINE_COUNTS_SQL, *params, top_n),
+            self.db_pool.fetch(TIMELINE_TITLES_SQL, *params, top_n),
+        )
+        # asyncpg already decoded array_agg into fresh lists capped at 5 by
+        # the LATERAL LIMIT; no copy needed
+        titles_by_year = {row["year"]: row["titles"] for row in title_rows}
+        return [
+            {
+                "year": row["year"],
+                "count": row["count"],
+                "titles": titles_by_year.get(row["year"], [])
+            }
+            for row in count_rows
+        ]
+
+    async def _compute(
+        self,
+        stat_type: str,
+        record_type: Optional[str],
+        tags: Optional[List[str]],
+        start_year: Optional[int],
+        end_year: Optional[int],
+        top_n: int
+    ) -> ToolResult:
+        """Run the aggregate query for a cache miss."""
+        try:
+            # All filter slots are always bound; unused ones are NULL. Tags
+            # go over the wire as a proper text[] (binary array codec) so
+            # `tags && $2` can bitmap-scan the GIN index.
+            params = (record_type, list(tags) if tags else None, start_year, end_year)
+
+            # Timeline issues two concurrent queries and manages its own
+            # short-lived pool connections (see _timeline); every other stat
+            # is a single statement on one acquired connection
+            if stat_type == "timeline":
+                result_data = {"timeline": await self._timeline(params, top_n)}
+
+            elif stat_type == "count":
+                async with self.db_pool.acquire() as conn:
+                    sql = COUNT_BY_TAGS_SQL if tags else COUNT_SQL
+                    row = await conn.fetchrow(sql, *params)
+                result_data = {"count": row["count"]}
+
+            elif stat_type == "tags_distribution":
+                async with self.db_pool.acquire() as conn:
+                    rows = None
+                    if not (record_type or tags or start_year or end_year):
+                        try:
+                            rows = await conn.fetch(TAG_COUNTS_SQL, top_n)
+                        except asyncpg.UndefinedTableError:
+                            # Counter table not created yet - try the view
+                            rows = None
+                    if rows is None and not tags and not start_year and not end_year:
+                        try:
+                            rows = await conn.fetch(MV_TAGS_SQL, record_type, top_n)
+                        except asyncpg.UndefinedTableError:
+                            # View not created yet - use the live aggregate
+                            rows = None
+                    if rows is None:
+                        rows = await conn.fetch(TAGS_DISTRIBUTION_SQL, *params, top_n)
+                result_data = {
+                    "tags": [{"tag": row["tag"], "count": row["count"]} for row in rows],
+                    "total_unique_tags": len(rows)
+                }
+
+            elif stat_type == "types_distribution":
+                async with self.db_pool.acquire() as conn:
+                    if not (record_type or tags or start_year or end_year):
+                        try:
+                            rows = await conn.fetch(TYPE_COUNTS_SQL)
+                        except asyncpg.UndefinedTableError:
+                            # Counter table not created yet - per-type COUNTs
+                            rows = sorted(
+                                await conn.fetch(TYPES_FAST_SQL),
+                                key=lambda row: row["count"],
+                                reverse=True,
+                            )
+                            rows = [row for row in rows if row["count"]]
+                    else:
+                        rows = await conn.fetch(TYPES_DISTRIBUTION_SQL, *params)
+                result_data = {
+                    "types": [{"type": row["type"], "count": row["count"]} for row in rows]
+                }
+
+            else:
+                return ToolResult(
+                    success=False,
+                    data=None,
+                    error=f"Unknown stat_type: {stat_type}"
+                )
             
             return ToolResult(
                 success=True,
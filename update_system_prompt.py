@@ -8,11 +8,11 @@ This will update the system prompt stored in the database. The RAG system will
 automatically pick up the new prompt in new conversations (within 5 minutes due to caching).
 """
 import os
-import json
 import asyncio
-import asyncpg
 from dotenv import load_dotenv
 
+from db import get_pool, close_pool
+
 load_dotenv()
 
 # The system prompt you want to set
@@ -29,49 +29,18 @@ async def update_system_prompt():
         return
 
     print('Connecting to database...')
-    conn = await asyncpg.connect(DATABASE_URL)
+    pool = await get_pool()
     try:
-        # Try to create a config table first (if it doesn't exist)
-        try:
-            await conn.execute('''
-                CREATE TABLE IF NOT EXISTS config (
-                    key TEXT PRIMARY KEY,
-                    value TEXT,
-                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-                )
-            ''')
-            print('✅ Config table ensured')
-            
-            # Insert/update the system prompt
-            await conn.execute('''
-                INSERT INTO config (key, value, updated_at) 
-                VALUES ('system_prompt', $1, NOW())
-                ON CONFLICT (key) 
-                DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()
-            ''', NEW_SYSTEM_PROMPT)
+        async with pool.acquire() as conn:
+            # The config table and set_config_value() are created once at
+            # deploy by db_create_config_table.py; the upsert logic lives
+            # server-side so this is one short statement per run
+            await conn.execute(
+                "SELECT set_config_value('system_prompt', $1)", NEW_SYSTEM_PROMPT
+            )
             print('✅ System prompt updated in config table')
-            
-        except Exception as e:
-            print(f'Config table approach failed: {e}')
-            print('Falling back to projects table approach...')
-            
-            # Fallback: use projects table with special record
-            system_prompt_data = {
-                'prompt': NEW_SYSTEM_PROMPT,
-                'type': 'system_config',
-                'updated_at': 'now'
-            }
-            
-            await conn.execute('''
-                INSERT INTO projects (id, title, summary, tags, url, data)
-                VALUES ('system_prompt', 'System Prompt Config', 'AI Assistant System Prompt', ARRAY['config'], '', $1)
-                ON CONFLICT (id) 
-                DO UPDATE SET data = EXCLUDED.data, title = EXCLUDED.title
-            ''', json.dumps(system_prompt_data))
-            print('✅ System prompt updated in projects table')
-            
     finally:
-        await conn.close()
+        await close_pool()
 
     print('\n🎉 System prompt updated successfully!')
     print('💡 The new prompt will be used in new conversations within 5 minutes (due to caching).')